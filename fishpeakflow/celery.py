@@ -0,0 +1,21 @@
+"""
+Celery application for fishpeakflow project.
+
+Start a worker with:
+
+    celery -A fishpeakflow worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fishpeakflow.settings')
+
+app = Celery('fishpeakflow')
+
+# Read the CELERY_* entries of the Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Load the tasks.py module of every installed app
+app.autodiscover_tasks()
@@ -125,3 +125,15 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Celery
+# https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+
+CELERY_BROKER_URL = 'redis://localhost:6379/0'
+
+# Run tasks in-process during development, so runserver works without Redis or a worker
+CELERY_TASK_ALWAYS_EAGER = DEBUG
+
+# Task progress is tracked on ComputationResults.status, not in a result backend
+CELERY_TASK_IGNORE_RESULT = True
@@ -0,0 +1,63 @@
+"""Compiled numeric kernels for the hydrograph pipeline.
+
+Numba is listed in requirements.txt but kept optional at import time. When
+it is not installed the kernels below are still importable as plain Python
+functions, but NUMBA_AVAILABLE is False and the calculators keep using their
+NumPy implementations.
+"""
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+
+# Series shorter than this are cheaper to run through NumPy than a kernel call
+KERNEL_MIN_SIZE = 64
+
+
+def _njit(func):
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True, fastmath=True)(func)
+    return func
+
+
+@_njit
+def scs_effective(hyet, cn):
+    """Fused SCS effective rainfall: cumulative depth, Ia, Fa, Pe and the
+    per-block difference (mm to cm) in a single pass over the hyetograph"""
+    n = hyet.shape[0]
+    out = np.zeros(n)
+    s = 25400.0 / cn - 254.0
+    ia_max = 0.2 * s
+
+    # Accumulation starts from the second block, as in compute_cumulative_precipitation
+    p = 0.0
+    prev_pe = 0.0
+    for i in range(n):
+        if i > 0:
+            p += hyet[i]
+        if p <= ia_max:
+            pe = 0.0
+        else:
+            fa = s * (p - ia_max) / (p - ia_max + s)
+            pe = max(0.0, p - ia_max - fa)
+        out[i] = (pe - prev_pe) / 10.0
+        prev_pe = pe
+    return out
+
+
+@_njit
+def convolve1d(re, q):
+    """Full discrete convolution of two float64 series"""
+    n = re.shape[0]
+    m = q.shape[0]
+    out = np.zeros(n + m - 1)
+    for i in range(n):
+        r = re[i]
+        for j in range(m):
+            out[i + j] += r * q[j]
+    return out
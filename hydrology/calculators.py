@@ -1,47 +1,71 @@
+import functools
+from types import MappingProxyType
+
 import numpy as np
-from typing import Dict, List, Tuple, Any
+from scipy.signal import fftconvolve
+from typing import Dict, List, Mapping, Tuple, Any
+
+from . import _kernels
+
+
+# FFT convolution beats the direct method only when both the multiply-add count
+# and the shorter series are large (measured crossover of scipy.signal.fftconvolve
+# vs _kernels.convolve1d; np.convolve runs within ~20% of convolve1d)
+FFT_CONVOLVE_THRESHOLD = 1_000_000
+FFT_CONVOLVE_MIN_WIDTH = 250
+
+# Default Horner coefficients based on typical urban drainage designs.
+# Entries are read-only, since get_coefficients hands out the cached values themselves.
+_HORNER_DATA = {
+    2:   MappingProxyType({"a": 1666.842, "b": 23.246, "c": 0.731}),
+    5:   MappingProxyType({"a": 1914.351, "b": 34.037, "c": 0.694}),
+    10:  MappingProxyType({"a": 2052.866, "b": 40.099, "c": 0.69}),
+    25:  MappingProxyType({"a": 2184.709, "b": 44.84, "c": 0.693}),
+    50:  MappingProxyType({"a": 2228.156, "b": 45.631, "c": 0.694}),
+    100: MappingProxyType({"a": 2232.124, "b": 44.432, "c": 0.694}),
+}
+_PERIODS = np.array(sorted(_HORNER_DATA))
+
+# SCS dimensionless unit hydrograph, Q/Qp at the given t/Tp ratios
+_T_TP = np.array([
+    0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.4, 1.5, 1.6, 1.7, 1.8, 1.9, 2.0, 2.2, 2.4, 2.6, 2.8, 3.0, 3.2, 3.4, 3.6, 3.8, 4.0, 4.5, 5.0,
+])
+_T_TP.flags.writeable = False
+
+_Q_QP = np.array([
+    0.000, 0.030, 0.100, 0.190, 0.310, 0.470, 0.660, 0.820, 0.930, 0.990, 1.000, 0.990,
+    0.930, 0.860, 0.780, 0.680, 0.560, 0.460, 0.390, 0.330, 0.280, 0.207, 0.147, 0.107,
+    0.077, 0.055, 0.040, 0.029, 0.021, 0.015, 0.011, 0.005, 0.000,
+])
+_Q_QP.flags.writeable = False
 
 
 def get_anti_diagonal_sums(matrix):
     """Compute anti-diagonal sums for hydrograph convolution"""
-    matrix = np.array(matrix)
-    # Flip matrix left-to-right to turn anti-diagonals into standard diagonals
-    flipped = np.fliplr(matrix)
-    
-    # Range of diagonals for an N x M matrix is from -(rows-1) to (cols-1)
+    matrix = np.asarray(matrix, dtype=np.float64)
     rows, cols = matrix.shape
-    sums = [flipped.diagonal(i).sum() for i in range(cols - 1, -rows, -1)]
     
-    return sums
+    # Element (i, j) lies on anti-diagonal k = i + j; sum every diagonal in one pass
+    k = np.add.outer(np.arange(rows), np.arange(cols))
+    return np.bincount(k.ravel(), weights=matrix.ravel(), minlength=rows + cols - 1).tolist()
 
 
 class HornerTable:
     """Compute Horner coefficients and precipitation data"""
     
     @staticmethod
-    def get_coefficients(return_period: float) -> Dict[str, float]:
+    @functools.lru_cache(maxsize=None)
+    def get_coefficients(return_period: float) -> Mapping[str, float]:
         """
-        Get Horner coefficients for a given return period.
+        Get read-only Horner coefficients for a given return period.
         Default coefficients based on typical urban drainage designs.
         """
-        data = {
-            2:   {"a": 1666.842, "b": 23.246, "c": 0.731},
-            5:   {"a": 1914.351, "b": 34.037, "c": 0.694},
-            10:  {"a": 2052.866, "b": 40.099, "c": 0.69},
-            25:  {"a": 2184.709, "b": 44.84, "c": 0.693},
-            50:  {"a": 2228.156, "b": 45.631, "c": 0.694},
-            100: {"a": 2232.124, "b": 44.432, "c": 0.694},
-        }
-        
-        if return_period in data:
-            return data[return_period]
+        if return_period in _HORNER_DATA:
+            return _HORNER_DATA[return_period]
         
-        # Find closest lower return period
-        sorted_periods = sorted(data.keys())
-        for p in reversed(sorted_periods):
-            if return_period >= p:
-                return data[p]
-        return data[sorted_periods[0]]
+        # Find closest lower return period, falling back to the smallest one
+        idx = max(int(np.searchsorted(_PERIODS, return_period, side='right')) - 1, 0)
+        return _HORNER_DATA[int(_PERIODS[idx])]
 
     @staticmethod
     def compute_intensity(a: float, b: float, c: float, t: float) -> float:
@@ -52,26 +76,26 @@ class HornerTable:
     def compute_intensity_table(horners: Dict[float, Dict[str, float]], 
                                durations: List[float]) -> Dict[float, Dict[float, float]]:
         """Compute precipitation intensity table"""
-        table = {}
-        for period, coeffs in horners.items():
-            table[period] = {}
-            for t in durations:
-                intensity = HornerTable.compute_intensity(coeffs['a'], coeffs['b'], coeffs['c'], t)
-                table[period][t] = round(intensity, 4)
-        return table
+        periods = list(horners)
+        a = np.array([horners[p]['a'] for p in periods], dtype=np.float64)[:, None]
+        b = np.array([horners[p]['b'] for p in periods], dtype=np.float64)[:, None]
+        c = np.array([horners[p]['c'] for p in periods], dtype=np.float64)[:, None]
+        t = np.asarray(durations, dtype=np.float64)[None, :]
+        
+        # (periods x durations) grid in a single broadcast evaluation
+        intensities = np.round(HornerTable.compute_intensity(a, b, c, t), 4)
+        return {period: dict(zip(durations, row)) for period, row in zip(periods, intensities.tolist())}
 
     @staticmethod
     def compute_accumulated_table(intensity_table: Dict[float, Dict[float, float]], 
                                  durations: List[float]) -> Dict[float, Dict[float, float]]:
         """Compute accumulated precipitation table"""
-        acc_table = {}
-        for period in intensity_table:
-            acc_table[period] = {}
-            for t in durations:
-                intensity = intensity_table[period][t]
-                accumulation = intensity * t
-                acc_table[period][t] = round(accumulation, 2)
-        return acc_table
+        periods = list(intensity_table)
+        intensities = np.array([[intensity_table[p][t] for t in durations] for p in periods], dtype=np.float64)
+        t = np.asarray(durations, dtype=np.float64)
+        
+        accumulations = np.round(intensities.reshape(len(periods), len(durations)) * t, 2)
+        return {period: dict(zip(durations, row)) for period, row in zip(periods, accumulations.tolist())}
 
 
 class HornerRainType:
@@ -79,59 +103,40 @@ class HornerRainType:
     
     @staticmethod
     def compute_precipitation_list(horners: Dict[str, float], unit_duration: float, 
-                                  max_duration: float = 24.0) -> Tuple[List[float], List[float]]:
-        """Compute precipitation intensity and accumulated precipitation lists"""
+                                  max_duration: float = 24.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compute time, precipitation intensity and accumulated precipitation arrays"""
         times = np.arange(0, max_duration + unit_duration, unit_duration)
-        intensities = []
-        accumulated = []
-        
-        for t in times:
-            if t == 0:
-                intensities.append(0)
-                accumulated.append(0)
-            else:
-                intensity = HornerTable.compute_intensity(horners['a'], horners['b'], horners['c'], t * 60)  # Convert to minutes
-                intensities.append(intensity)
-                
-                if len(accumulated) == 0:
-                    acc = intensity * unit_duration
-                else:
-                    acc = accumulated[-1] + intensity * unit_duration
-                accumulated.append(acc)
+        intensities = np.where(
+            times == 0,
+            0.0,
+            HornerTable.compute_intensity(horners['a'], horners['b'], horners['c'], times * 60),  # Convert to minutes
+        )
+        accumulated = np.cumsum(intensities) * unit_duration
         
-        return times.tolist(), intensities, accumulated
+        return times, intensities, accumulated
 
     @staticmethod
-    def compute_unit_duration_precipitation(times: List[float], accumulated: List[float]) -> List[float]:
+    def compute_unit_duration_precipitation(times: np.ndarray, accumulated: np.ndarray) -> np.ndarray:
         """Compute discrete difference of accumulated precipitation"""
-        unit_precip = [0]
-        for i in range(1, len(accumulated)):
-            unit_precip.append(accumulated[i] - accumulated[i-1])
-        return unit_precip
+        return np.concatenate(([0.0], np.diff(accumulated)))
 
     @staticmethod
-    def alternating_block_sort(values: List[float]) -> List[float]:
+    def alternating_block_sort(values: np.ndarray) -> np.ndarray:
         """Sort values using alternating block method"""
-        sorted_values = sorted(values)
-        result = []
-        left = 0
-        right = len(sorted_values) - 1
+        sorted_values = np.sort(np.asarray(values, dtype=np.float64))
+        n = sorted_values.size
         
-        while left <= right:
-            if left == right:
-                result.append(sorted_values[left])
-            else:
-                result.append(sorted_values[right])
-                result.append(sorted_values[left])
-            left += 1
-            right -= 1
+        # Even slots take the largest values downwards, odd slots the smallest upwards
+        order = np.empty(n, dtype=np.intp)
+        order[0::2] = np.arange(n - 1, n // 2 - 1, -1)
+        order[1::2] = np.arange(n // 2)
         
-        return result[:len(values)]  # Ensure correct length
+        return sorted_values[order]
 
     @staticmethod
-    def create_hyetograph(unit_precip_percent: List[float], total_24hr_precip: float) -> List[float]:
+    def create_hyetograph(unit_precip_percent: np.ndarray, total_24hr_precip: float) -> np.ndarray:
         """Create hyetograph by applying percentages to total precipitation"""
-        return [p * total_24hr_precip / 100 for p in unit_precip_percent]
+        return np.asarray(unit_precip_percent, dtype=np.float64) * total_24hr_precip / 100
 
 
 class EffectiveRainfall:
@@ -145,42 +150,31 @@ class EffectiveRainfall:
         return s, ia_max
 
     @staticmethod
-    def compute_cumulative_precipitation(hyetograph: List[float]) -> List[float]:
+    def compute_cumulative_precipitation(hyetograph: np.ndarray) -> np.ndarray:
         """Compute cumulative precipitation from hyetograph"""
-        cumulative = [0]
-        for i in range(1, len(hyetograph)):
-            cumulative.append(cumulative[-1] + hyetograph[i])
-        return cumulative
+        # Accumulation starts from the second block, as in the original recurrence
+        return np.concatenate(([0.0], np.cumsum(hyetograph[1:])))
 
     @staticmethod
-    def compute_effective_rainfall(hyetograph: List[float], cn: int) -> List[float]:
+    def compute_effective_rainfall(hyetograph: np.ndarray, cn: int) -> np.ndarray:
         """Compute effective rainfall using SCS method"""
+        if _kernels.NUMBA_AVAILABLE and len(hyetograph) >= _kernels.KERNEL_MIN_SIZE:
+            return _kernels.scs_effective(np.asarray(hyetograph, dtype=np.float64), cn)
+
         s, ia_max = EffectiveRainfall.compute_s_and_ia_max(cn)
-        cumulative = EffectiveRainfall.compute_cumulative_precipitation(hyetograph)
-        
-        effective_rainfall = []
-        for i, p in enumerate(cumulative):
-            if p <= ia_max:
-                ia = p
-            else:
-                ia = ia_max
-            
-            if p <= ia_max:
-                fa = 0
-            else:
-                fa = s * (p - ia_max) / (p - ia_max + s)
-            
-            pe = max(0, p - ia - fa)
-            effective_rainfall.append(pe)
+        cumulative = EffectiveRainfall.compute_cumulative_precipitation(np.asarray(hyetograph, dtype=np.float64))
+
+        ia = np.minimum(cumulative, ia_max)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fa = np.where(
+                cumulative <= ia_max,
+                0.0,
+                s * (cumulative - ia_max) / (cumulative - ia_max + s),
+            )
+        effective_rainfall = np.maximum(0.0, cumulative - ia - fa)
         
         # Compute discrete difference and convert mm to cm
-        unit_effective = []
-        for i in range(len(effective_rainfall)):
-            if i == 0:
-                diff = effective_rainfall[i]
-            else:
-                diff = effective_rainfall[i] - effective_rainfall[i-1]
-            unit_effective.append(diff / 10)  # Convert mm to cm
+        unit_effective = np.diff(effective_rainfall, prepend=0.0) / 10
         
         return unit_effective
 
@@ -214,23 +208,38 @@ class TimeConcentration:
         t2 = TimeConcentration.compute_channel_flow_time(length, manning_n, hydraulic_radius, slope)
         return t1 + t2
 
+    @staticmethod
+    def compute_time_of_concentration_batch(length: np.ndarray, elevation_diff: np.ndarray,
+                                           manning_n: np.ndarray, hydraulic_radius: np.ndarray,
+                                           slope: np.ndarray) -> np.ndarray:
+        """Compute time of concentration for many scenarios at once (e.g. parameter sweeps)"""
+        length, elevation_diff, manning_n, hydraulic_radius, slope = np.broadcast_arrays(
+            *(np.asarray(x, dtype=np.float64) for x in (length, elevation_diff, manning_n, hydraulic_radius, slope))
+        )
+        s, _ = EffectiveRainfall.compute_s_and_ia_max(50)  # Use default CN for slope calculation
+
+        # Same zero-time guards as the scalar path; masked entries are never evaluated
+        overland = elevation_diff > 0
+        t1 = np.zeros(length.shape)
+        t1[overland] = (length[overland] ** 0.8) * ((s + 25.4) ** 0.7) / (4238 * np.sqrt(elevation_diff[overland]))
+
+        channel = (hydraulic_radius > 0) & (slope > 0)
+        if np.any(manning_n[channel] == 0):
+            raise ZeroDivisionError("manning_n must be non-zero where hydraulic_radius and slope are positive")
+        velocity = (1 / manning_n[channel]) * (hydraulic_radius[channel] ** (2/3)) * np.sqrt(slope[channel])
+        t2 = np.zeros(length.shape)
+        t2[channel] = length[channel] / (3600 * velocity)  # Convert to hours
+
+        return t1 + t2
+
 
 class DimensionlessUnitHydrograph:
     """Compute unit hydrograph and outflow hydrograph"""
     
     @staticmethod
     def get_default_dimensionless_uh() -> Tuple[np.ndarray, np.ndarray]:
-        """Get default SCS dimensionless unit hydrograph"""
-        T_Tp = np.array([
-            0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.4, 1.5, 1.6, 1.7, 1.8, 1.9, 2.0, 2.2, 2.4, 2.6, 2.8, 3.0, 3.2, 3.4, 3.6, 3.8, 4.0, 4.5, 5.0,
-        ])
-
-        Q_Qp = np.array([
-            0.000, 0.030, 0.100, 0.190, 0.310, 0.470, 0.660, 0.820, 0.930, 0.990, 1.000, 0.990,
-            0.930, 0.860, 0.780, 0.680, 0.560, 0.460, 0.390, 0.330, 0.280, 0.207, 0.147, 0.107,
-            0.077, 0.055, 0.040, 0.029, 0.021, 0.015, 0.011, 0.005, 0.000,
-        ])
-        return T_Tp, Q_Qp
+        """Get default SCS dimensionless unit hydrograph (read-only arrays)"""
+        return _T_TP, _Q_QP
 
     @staticmethod
     def compute_peak_flow(tc: float, area: float, unit_rainfall: float, unit_duration: float) -> Tuple[float, float, float]:
@@ -243,26 +252,32 @@ class DimensionlessUnitHydrograph:
 
     @staticmethod
     def compute_unit_hydrograph(t_p: float, q_p: float, time_ratios: List[float], 
-                               discharge_ratios: List[float]) -> Tuple[List[float], List[float]]:
+                               discharge_ratios: List[float]) -> Tuple[np.ndarray, np.ndarray]:
         """Compute unit hydrograph from dimensionless data"""
-        T = [tr * t_p for tr in time_ratios]
-        Q = [qr * q_p for qr in discharge_ratios]
+        T = np.asarray(time_ratios, dtype=np.float64) * t_p
+        Q = np.asarray(discharge_ratios, dtype=np.float64) * q_p
         return T, Q
 
     @staticmethod
-    def interpolate_unit_hydrograph(T: List[float], Q: List[float], 
-                                  unit_duration: float) -> Tuple[List[float], List[float]]:
+    def interpolate_unit_hydrograph(T: np.ndarray, Q: np.ndarray, 
+                                  unit_duration: float) -> Tuple[np.ndarray, np.ndarray]:
         """Interpolate unit hydrograph to specific time intervals"""
-        T_interp = np.arange(0, max(T) + unit_duration, unit_duration)
+        T = np.asarray(T, dtype=np.float64)
+        # Time ratios are monotonic, so the last sample is the base time
+        T_interp = np.arange(0, T[-1] + unit_duration, unit_duration)
         Q_interp = np.interp(T_interp, T, Q)
-        return T_interp.tolist(), Q_interp.tolist()
+        return T_interp, Q_interp
 
     @staticmethod
-    def compute_outflow_hydrograph(q_interp: List[float], re_values: List[float]) -> List[float]:
+    def compute_outflow_hydrograph(q_interp: np.ndarray, re_values: np.ndarray) -> np.ndarray:
         """Compute outflow hydrograph through convolution"""
-        matrix = []
-        for re in re_values:
-            scaled_q = [q * re for q in q_interp]
-            matrix.append(scaled_q)
-        
-        return get_anti_diagonal_sums(matrix)
\ No newline at end of file
+        # Anti-diagonal sums of the outer product re_values x q_interp are
+        # exactly the full discrete convolution of the two sequences
+        re_arr = np.asarray(re_values, dtype=np.float64)
+        q_arr = np.asarray(q_interp, dtype=np.float64)
+        if (re_arr.size * q_arr.size > FFT_CONVOLVE_THRESHOLD
+                and min(re_arr.size, q_arr.size) >= FFT_CONVOLVE_MIN_WIDTH):
+            return fftconvolve(re_arr, q_arr)
+        if _kernels.NUMBA_AVAILABLE and re_arr.size >= _kernels.KERNEL_MIN_SIZE:
+            return _kernels.convolve1d(re_arr, q_arr)
+        return np.convolve(re_arr, q_arr)
\ No newline at end of file
@@ -1,3 +1,6 @@
+import json
+
+import numpy as np
 from django import forms
 from .models import HydrologyProject, HornerCoefficients, WatershedParameters, RainfallParameters, UnitHydrographData
 
@@ -106,10 +109,11 @@ class UnitHydrographDataForm(forms.ModelForm):
         data = self.cleaned_data['time_ratios']
         try:
             # Parse JSON or comma-separated values
-            if data.strip().startswith('['):
-                ratios = json.loads(data)
+            text = data.lstrip()
+            if text[:1] == '[':
+                ratios = json.loads(text)
             else:
-                ratios = [float(x.strip()) for x in data.split(',')]
+                ratios = np.array(text.split(','), dtype=np.float64).tolist()
             return ratios
         except (json.JSONDecodeError, ValueError):
             raise forms.ValidationError("Invalid format. Use comma-separated values or JSON array.")
@@ -118,10 +122,11 @@ class UnitHydrographDataForm(forms.ModelForm):
         data = self.cleaned_data['discharge_ratios']
         try:
             # Parse JSON or comma-separated values
-            if data.strip().startswith('['):
-                ratios = json.loads(data)
+            text = data.lstrip()
+            if text[:1] == '[':
+                ratios = json.loads(text)
             else:
-                ratios = [float(x.strip()) for x in data.split(',')]
+                ratios = np.array(text.split(','), dtype=np.float64).tolist()
             return ratios
         except (json.JSONDecodeError, ValueError):
             raise forms.ValidationError("Invalid format. Use comma-separated values or JSON array.")
@@ -202,7 +207,3 @@ class ComputationConfigForm(forms.Form):
         widget=forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}),
         initial=[1, 3, 6, 12, 18, 24]
     )
-
-
-# Import json for parsing
-import json
\ No newline at end of file
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydrology', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='computationresults',
+            name='accumulation_table',
+            field=models.JSONField(blank=True, help_text='Accumulated precipitation table', null=True),
+        ),
+        migrations.AlterField(
+            model_name='computationresults',
+            name='effective_rainfall',
+            field=models.JSONField(blank=True, help_text='Effective rainfall data', null=True),
+        ),
+        migrations.AlterField(
+            model_name='computationresults',
+            name='hyetograph',
+            field=models.JSONField(blank=True, help_text='Hyetograph data', null=True),
+        ),
+        migrations.AlterField(
+            model_name='computationresults',
+            name='intensity_table',
+            field=models.JSONField(blank=True, help_text='Precipitation intensity table', null=True),
+        ),
+        migrations.AlterField(
+            model_name='computationresults',
+            name='outflow_hydrograph',
+            field=models.JSONField(blank=True, help_text='Outflow hydrograph data', null=True),
+        ),
+        migrations.AlterField(
+            model_name='computationresults',
+            name='unit_hydrograph',
+            field=models.JSONField(blank=True, help_text='Unit hydrograph data', null=True),
+        ),
+    ]
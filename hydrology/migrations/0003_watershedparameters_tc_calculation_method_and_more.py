@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydrology', '0002_alter_computationresults_accumulation_table_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watershedparameters',
+            name='tc_calculation_method',
+            field=models.CharField(choices=[('computed', 'Compute from parameters'), ('direct', 'Input directly')], default='computed', help_text='How to determine time of concentration', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='watershedparameters',
+            name='time_concentration',
+            field=models.FloatField(blank=True, help_text='Time of concentration Tc (hours)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='watershedparameters',
+            name='elevation_diff',
+            field=models.FloatField(blank=True, help_text='Elevation difference H (m)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='watershedparameters',
+            name='hydraulic_radius',
+            field=models.FloatField(blank=True, help_text='Hydraulic radius R (m)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='watershedparameters',
+            name='length',
+            field=models.FloatField(blank=True, help_text='Flow path length L (m)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='watershedparameters',
+            name='manning_n',
+            field=models.FloatField(blank=True, help_text="Manning's roughness coefficient n", null=True),
+        ),
+    ]
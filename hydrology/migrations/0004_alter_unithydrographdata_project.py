@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydrology', '0003_watershedparameters_tc_calculation_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='unithydrographdata',
+            name='project',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='hydrology.hydrologyproject'),
+        ),
+    ]
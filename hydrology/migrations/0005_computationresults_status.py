@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydrology', '0004_alter_unithydrographdata_project'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='computationresults',
+            name='error_message',
+            field=models.TextField(blank=True, default='', help_text='Error of the latest failed computation'),
+        ),
+        # Results stored before this migration were computed synchronously, so they are complete
+        migrations.AddField(
+            model_name='computationresults',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='done', help_text='Status of the latest computation', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='computationresults',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', help_text='Status of the latest computation', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydrology', '0005_computationresults_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='computationresults',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When the latest computation was queued', null=True),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 import json
 
 
@@ -79,8 +82,31 @@ class RainfallParameters(models.Model):
 
 class ComputationResults(models.Model):
     """Store computation results for each project"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    # A queued or running computation that has not finished after this long is reported as failed
+    STALE_AFTER = timedelta(minutes=10)
+    
     project = models.OneToOneField(HydrologyProject, on_delete=models.CASCADE)
     
+    # State of the latest computation run by the worker
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            (STATUS_PENDING, 'Pending'),
+            (STATUS_RUNNING, 'Running'),
+            (STATUS_DONE, 'Done'),
+            (STATUS_FAILED, 'Failed')
+        ],
+        default=STATUS_PENDING,
+        help_text="Status of the latest computation"
+    )
+    error_message = models.TextField(blank=True, default='', help_text="Error of the latest failed computation")
+    started_at = models.DateTimeField(blank=True, null=True, help_text="When the latest computation was queued")
+    
     # Store results as JSON for flexibility
     intensity_table = models.JSONField(help_text="Precipitation intensity table", blank=True, null=True)
     accumulation_table = models.JSONField(help_text="Accumulated precipitation table", blank=True, null=True)
@@ -94,11 +120,17 @@ class ComputationResults(models.Model):
     
     def __str__(self):
         return f"{self.project.name} - Results"
+    
+    def is_stale(self):
+        """Whether the latest computation is still queued or running after STALE_AFTER"""
+        if self.status not in (self.STATUS_PENDING, self.STATUS_RUNNING):
+            return False
+        return self.started_at is None or timezone.now() - self.started_at > self.STALE_AFTER
 
 
 class UnitHydrographData(models.Model):
     """Store dimensionless unit hydrograph parameters"""
-    project = models.ForeignKey(HydrologyProject, on_delete=models.CASCADE)
+    project = models.OneToOneField(HydrologyProject, on_delete=models.CASCADE)
     
     # Time ratios and discharge ratios for dimensionless hydrograph
     time_ratios = models.JSONField(help_text="Time ratios t/Tp")
@@ -0,0 +1,132 @@
+"""Celery tasks of the hydrology app.
+
+The hydrograph computation runs on a Celery worker so the request that
+starts it returns immediately; its progress is tracked by the status of
+the project's ComputationResults row.
+"""
+import numpy as np
+from celery import shared_task
+from django.db import transaction
+
+from .models import HydrologyProject, ComputationResults
+from .calculators import HornerTable, HornerRainType, EffectiveRainfall, TimeConcentration, DimensionlessUnitHydrograph
+
+
+def _as_list(values):
+    """Convert calculator output to a JSON-serializable list at the storage boundary"""
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+@shared_task(ignore_result=True)
+def run_project_compute(pk):
+    """Run complete hydrograph computation for a project"""
+    project = HydrologyProject.objects.select_related(
+        'watershedparameters', 'rainfallparameters', 'unithydrographdata', 'computationresults'
+    ).filter(pk=pk).first()
+    results = getattr(project, 'computationresults', None)
+    if results is None:
+        # The project or its pending results were deleted before the worker picked the task up
+        return
+    
+    results.status = ComputationResults.STATUS_RUNNING
+    results.save(update_fields=['status'])
+    
+    try:
+        horner_coeffs = project.hornercoefficients_set.all()
+        watershed_params = project.watershedparameters
+        rainfall_params = project.rainfallparameters
+        unit_hydrograph_data = project.unithydrographdata
+        
+        with transaction.atomic():
+            # Prepare Horner coefficients dictionary, keyed in ascending return period order
+            coeffs_by_period = {coeff.return_period: coeff for coeff in horner_coeffs}
+            periods = sorted(coeffs_by_period)
+            horners = {p: {'a': coeffs_by_period[p].coefficient_a, 'b': coeffs_by_period[p].coefficient_b,
+                           'c': coeffs_by_period[p].coefficient_c}
+                      for p in periods}
+            max_return_period = periods[-1]
+            
+            # Target configurations
+            durations_a = [5, 10, 30, 60, 120, 180, 360, 1440]  # minutes
+            
+            # Step 1: Compute intensity table
+            intensity_table = HornerTable.compute_intensity_table(horners, durations_a)
+            
+            # Step 2: Compute accumulated precipitation table
+            accumulation_table = HornerTable.compute_accumulated_table(intensity_table, durations_a)
+            
+            # Step 3: Compute Horner rain type (using 100-year return period for hyetograph)
+            max_coeffs = horners[max_return_period]
+            times, intensities, accumulated = HornerRainType.compute_precipitation_list(
+                max_coeffs, rainfall_params.unit_duration
+            )
+            
+            # Step 4: Compute unit duration precipitation and percentages
+            unit_precip = HornerRainType.compute_unit_duration_precipitation(times, accumulated)
+            total_precip = unit_precip.sum()
+            unit_precip_percent = unit_precip * 100 / total_precip if total_precip > 0 else np.zeros_like(unit_precip)
+            sorted_percentages = HornerRainType.alternating_block_sort(unit_precip_percent)
+            
+            # Step 5: Create hyetograph using 24hr precipitation
+            total_24hr_precip = accumulation_table.get(max_return_period, {}).get(1440, 0)
+            hyetograph = HornerRainType.create_hyetograph(sorted_percentages, total_24hr_precip)
+            
+            # Step 6: Compute effective rainfall
+            effective_rainfall = EffectiveRainfall.compute_effective_rainfall(hyetograph, rainfall_params.curve_number)
+            
+            # Step 7: Get time of concentration
+            if watershed_params.tc_calculation_method == 'direct':
+                time_concentration = watershed_params.time_concentration
+            else:
+                # Compute from watershed parameters
+                slope = watershed_params.elevation_diff / watershed_params.length if watershed_params.length > 0 else 0
+                time_concentration = TimeConcentration.compute_time_of_concentration(
+                    watershed_params.length,
+                    watershed_params.elevation_diff,
+                    watershed_params.manning_n,
+                    watershed_params.hydraulic_radius,
+                    slope
+                )
+            
+            # Step 8: Compute unit hydrograph
+            t_b, t_p, q_p = DimensionlessUnitHydrograph.compute_peak_flow(
+                time_concentration,
+                watershed_params.area,
+                unit_hydrograph_data.effective_rainfall,
+                rainfall_params.unit_duration
+            )
+            
+            T, Q = DimensionlessUnitHydrograph.compute_unit_hydrograph(
+                t_p, q_p, 
+                unit_hydrograph_data.time_ratios,
+                unit_hydrograph_data.discharge_ratios
+            )
+            
+            T_interp, Q_interp = DimensionlessUnitHydrograph.interpolate_unit_hydrograph(
+                T, Q, rainfall_params.unit_duration
+            )
+            
+            # Step 9: Compute outflow hydrograph
+            outflow_hydrograph = DimensionlessUnitHydrograph.compute_outflow_hydrograph(Q_interp, effective_rainfall)
+            
+            # Save results: a single UPDATE of the row marked pending by project_compute
+            values = {
+                'status': ComputationResults.STATUS_DONE,
+                'error_message': '',
+                # JSONField encoding turns the int keys into strings, no need to rebuild the dicts
+                'intensity_table': intensity_table,
+                'accumulation_table': accumulation_table,
+                'hyetograph': _as_list(hyetograph),
+                'effective_rainfall': _as_list(effective_rainfall),
+                'time_concentration': time_concentration,
+                'unit_hydrograph': {'time': _as_list(T_interp), 'discharge': _as_list(Q_interp)},
+                'outflow_hydrograph': _as_list(outflow_hydrograph),
+            }
+            for key, value in values.items():
+                setattr(results, key, value)
+            results.save()
+    
+    except Exception as e:
+        results.status = ComputationResults.STATUS_FAILED
+        results.error_message = str(e)
+        results.save(update_fields=['status', 'error_message'])
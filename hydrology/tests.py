@@ -1,3 +1,215 @@
-from django.test import TestCase
+from datetime import timedelta
+from itertools import product
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from fishpeakflow.celery import app as celery_app
+
+from . import _kernels
+from .calculators import FFT_CONVOLVE_THRESHOLD, EffectiveRainfall, DimensionlessUnitHydrograph, TimeConcentration
+from .models import HydrologyProject, HornerCoefficients, WatershedParameters, RainfallParameters, ComputationResults, UnitHydrographData
+
+
+HORNER_DEFAULTS = [
+    (2, 1666.842, 23.246, 0.731),
+    (5, 1914.351, 34.037, 0.694),
+    (10, 2052.866, 40.099, 0.69),
+    (25, 2184.709, 44.84, 0.693),
+    (50, 2228.156, 45.631, 0.694),
+    (100, 2232.124, 44.432, 0.694),
+]
+
+
+def create_project(name='Test project'):
+    """Create a fully configured project, ready to compute"""
+    project = HydrologyProject.objects.create(name=name)
+    HornerCoefficients.objects.bulk_create([
+        HornerCoefficients(project=project, return_period=p, coefficient_a=a, coefficient_b=b, coefficient_c=c)
+        for p, a, b, c in HORNER_DEFAULTS
+    ])
+    WatershedParameters.objects.create(project=project, area=1.2, tc_calculation_method='direct', time_concentration=0.5)
+    RainfallParameters.objects.create(project=project, curve_number=75, unit_duration=0.5)
+    time_ratios, discharge_ratios = DimensionlessUnitHydrograph.get_default_dimensionless_uh()
+    UnitHydrographData.objects.create(
+        project=project,
+        time_ratios=time_ratios.tolist(),
+        discharge_ratios=discharge_ratios.tolist(),
+    )
+    return project
+
+
+class ProjectComputeTests(TestCase):
+    """project_compute queues run_project_compute, which runs in-process with CELERY_TASK_ALWAYS_EAGER"""
+
+    def setUp(self):
+        # The namespaced key is the one Celery reads from the Django settings
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+        self.addCleanup(celery_app.conf.update, CELERY_TASK_ALWAYS_EAGER=always_eager)
+        self.project = create_project()
+
+    def compute(self):
+        return self.client.get(reverse('hydrology:project_compute', args=[self.project.pk]))
+
+    def test_compute_stores_done_results(self):
+        with mock.patch('hydrology.tasks.run_project_compute.delay'):
+            self.compute()
+        results = ComputationResults.objects.get(project=self.project)
+        self.assertEqual(results.status, ComputationResults.STATUS_PENDING)
+        self.assertIsNone(results.outflow_hydrograph)
+
+        response = self.compute()
+        self.assertRedirects(response, reverse('hydrology:project_results', args=[self.project.pk]))
+        results.refresh_from_db()
+        self.assertEqual(results.status, ComputationResults.STATUS_DONE)
+        self.assertEqual(results.error_message, '')
+        self.assertTrue(results.outflow_hydrograph)
+
+        status = self.client.get(reverse('hydrology:project_status', args=[self.project.pk])).json()
+        self.assertEqual(status, {'status': 'done', 'error_message': ''})
+        response = self.client.get(reverse('hydrology:project_results', args=[self.project.pk]))
+        self.assertTemplateUsed(response, 'hydrology/project_results.html')
+
+    def test_failed_computation_saves_error_message(self):
+        with mock.patch('hydrology.tasks.HornerTable.compute_intensity_table', side_effect=ValueError('bad coefficients')):
+            self.compute()
+        results = ComputationResults.objects.get(project=self.project)
+        self.assertEqual(results.status, ComputationResults.STATUS_FAILED)
+        self.assertEqual(results.error_message, 'bad coefficients')
+
+        status = self.client.get(reverse('hydrology:project_status', args=[self.project.pk])).json()
+        self.assertEqual(status, {'status': 'failed', 'error_message': 'bad coefficients'})
+        response = self.client.get(reverse('hydrology:project_results', args=[self.project.pk]))
+        self.assertTemplateUsed(response, 'hydrology/project_pending.html')
+        self.assertContains(response, 'bad coefficients')
+
+    def test_enqueue_failure_marks_first_run_failed(self):
+        with mock.patch('hydrology.views.run_project_compute.delay', side_effect=OperationalError('broker down')):
+            response = self.compute()
+        self.assertRedirects(response, reverse('hydrology:project_detail', args=[self.project.pk]))
+        messages = [str(message) for message in response.wsgi_request._messages]
+        self.assertIn('Computation could not be started: broker down', messages)
+        results = ComputationResults.objects.get(project=self.project)
+        self.assertEqual(results.status, ComputationResults.STATUS_FAILED)
+        self.assertIn('broker down', results.error_message)
+
+    def test_enqueue_failure_keeps_previous_results(self):
+        self.compute()
+        done = ComputationResults.objects.get(project=self.project)
+
+        with mock.patch('hydrology.views.run_project_compute.delay', side_effect=OperationalError('broker down')):
+            self.compute()
+        results = ComputationResults.objects.get(project=self.project)
+        self.assertEqual(results.status, ComputationResults.STATUS_DONE)
+        self.assertEqual(results.started_at, done.started_at)
+        self.assertEqual(results.outflow_hydrograph, done.outflow_hydrograph)
+
+        response = self.client.get(reverse('hydrology:export_results', args=[self.project.pk, 'json']))
+        self.assertEqual(response.status_code, 200)
+
+    def test_stale_computation_is_reported_failed(self):
+        ComputationResults.objects.create(
+            project=self.project,
+            status=ComputationResults.STATUS_RUNNING,
+            started_at=timezone.now() - ComputationResults.STALE_AFTER - timedelta(minutes=1),
+        )
+        status = self.client.get(reverse('hydrology:project_status', args=[self.project.pk])).json()
+        self.assertEqual(status['status'], 'failed')
+        self.assertEqual(ComputationResults.objects.get(project=self.project).status, ComputationResults.STATUS_FAILED)
+
+    def test_export_refuses_unfinished_results(self):
+        for status in (ComputationResults.STATUS_PENDING, ComputationResults.STATUS_RUNNING, ComputationResults.STATUS_FAILED):
+            ComputationResults.objects.update_or_create(
+                project=self.project, defaults={'status': status, 'started_at': timezone.now()}
+            )
+            for format_type in ('csv', 'json'):
+                response = self.client.get(reverse('hydrology:export_results', args=[self.project.pk, format_type]))
+                self.assertRedirects(response, reverse('hydrology:project_detail', args=[self.project.pk]))
+
+
+class TimeConcentrationBatchTests(SimpleTestCase):
+    """compute_time_of_concentration_batch matches the scalar compute_time_of_concentration"""
+
+    GRID = list(product(
+        (10.0, 850.0),         # length
+        (-1.0, 0.0, 12.5),     # elevation_diff
+        (0.0, 0.035),          # manning_n
+        (-0.2, 0.0, 0.6),      # hydraulic_radius
+        (-0.01, 0.0, 0.02),    # slope
+    ))
+
+    def test_batch_matches_scalar(self):
+        for args in self.GRID:
+            with self.subTest(args=args), np.errstate(all='raise'):
+                try:
+                    expected = TimeConcentration.compute_time_of_concentration(*args)
+                except ZeroDivisionError:
+                    with self.assertRaises(ZeroDivisionError):
+                        TimeConcentration.compute_time_of_concentration_batch(*args)
+                else:
+                    self.assertAlmostEqual(float(TimeConcentration.compute_time_of_concentration_batch(*args)), expected)
+
+    def test_batch_over_whole_grid(self):
+        grid = [args for args in self.GRID if args[2] > 0]
+        expected = [TimeConcentration.compute_time_of_concentration(*args) for args in grid]
+        with np.errstate(all='raise'):
+            result = TimeConcentration.compute_time_of_concentration_batch(*np.array(grid).T)
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+        with self.assertRaises(ZeroDivisionError):
+            TimeConcentration.compute_time_of_concentration_batch(*np.array(self.GRID).T)
+
+
+# Series lengths on both sides of _kernels.KERNEL_MIN_SIZE
+SERIES_LENGTHS = (1, 2, 10, _kernels.KERNEL_MIN_SIZE - 1, _kernels.KERNEL_MIN_SIZE, 200, 1000)
+
+
+@skipUnless(_kernels.NUMBA_AVAILABLE, 'numba is not installed')
+class CompiledKernelTests(SimpleTestCase):
+    """The fastmath Numba kernels agree with the NumPy implementations they replace"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def numpy_effective_rainfall(self, hyetograph, cn):
+        with mock.patch.object(_kernels, 'NUMBA_AVAILABLE', False):
+            return EffectiveRainfall.compute_effective_rainfall(hyetograph, cn)
+
+    def test_scs_effective_matches_numpy(self):
+        for n in SERIES_LENGTHS:
+            # Storm depths from light to heavy, so runoff starts at different blocks
+            for scale in (0.1, 5.0, 50.0):
+                hyetograph = self.rng.random(n) * scale
+                for cn in (40, 75, 98):
+                    with self.subTest(n=n, scale=scale, cn=cn):
+                        expected = self.numpy_effective_rainfall(hyetograph, cn)
+                        np.testing.assert_allclose(_kernels.scs_effective(hyetograph, cn), expected, rtol=1e-9, atol=1e-12)
+                        np.testing.assert_allclose(
+                            EffectiveRainfall.compute_effective_rainfall(hyetograph, cn), expected, rtol=1e-9, atol=1e-12
+                        )
+
+    def test_convolve1d_matches_numpy(self):
+        for n in SERIES_LENGTHS:
+            for m in (1, 7, 8, 9, 16, 17, 32, 33, 100):
+                with self.subTest(n=n, m=m):
+                    re = self.rng.random(n)
+                    q = self.rng.random(m)
+                    np.testing.assert_allclose(_kernels.convolve1d(re, q), np.convolve(re, q), rtol=1e-9, atol=1e-12)
+
+    def test_outflow_hydrograph_matches_numpy(self):
+        for m in (1, 7, 33, 100):
+            for n in SERIES_LENGTHS:
+                with self.subTest(m=m, n=n):
+                    q_interp = self.rng.random(m)
+                    re_values = self.rng.random(n)
+                    self.assertLessEqual(m * n, FFT_CONVOLVE_THRESHOLD)
+                    np.testing.assert_allclose(
+                        DimensionlessUnitHydrograph.compute_outflow_hydrograph(q_interp, re_values),
+                        np.convolve(re_values, q_interp),
+                        rtol=1e-9, atol=1e-12,
+                    )
@@ -10,5 +10,6 @@ urlpatterns = [
     path('project/<int:pk>/edit/', views.ProjectUpdateView.as_view(), name='project_edit'),
     path('project/<int:pk>/compute/', views.project_compute, name='project_compute'),
     path('project/<int:pk>/results/', views.project_results, name='project_results'),
+    path('project/<int:pk>/status/', views.project_status, name='project_status'),
     path('project/<int:pk>/export/<str:format_type>/', views.export_results, name='export_results'),
 ]
\ No newline at end of file
@@ -1,17 +1,30 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.views.generic.edit import FormMixin
 from django.contrib.auth.mixins import LoginRequiredMixin
-import json
 import csv
-from io import StringIO
+
+import orjson
+from kombu.exceptions import OperationalError
 
 from .models import HydrologyProject, HornerCoefficients, WatershedParameters, RainfallParameters, ComputationResults, UnitHydrographData
 from .forms import ProjectForm, HornerCoefficientsForm, WatershedParametersForm, RainfallParametersForm, ComputationConfigForm, UnitHydrographDataForm
-from .calculators import HornerTable, HornerRainType, EffectiveRainfall, TimeConcentration, DimensionlessUnitHydrograph
+from .calculators import DimensionlessUnitHydrograph
+from .tasks import run_project_compute
+
+
+# Watershed fields required by each time of concentration method
+WATERSHED_COMPUTED_FIELDS = ('length', 'elevation_diff', 'manning_n', 'hydraulic_radius')
+WATERSHED_DIRECT_FIELDS = ('time_concentration',)
+
+# Rainfall fields and the type each is parsed as
+RAINFALL_FIELDS = (('curve_number', int), ('unit_duration', float))
 
 
 class ProjectListView(ListView):
@@ -26,14 +39,20 @@ class ProjectDetailView(DetailView):
     template_name = 'hydrology/project_detail.html'
     context_object_name = 'project'
     
+    def get_queryset(self):
+        # One-to-one relations join into the project query; the Horner set is prefetched
+        return HydrologyProject.objects.select_related(
+            'watershedparameters', 'rainfallparameters', 'computationresults', 'unithydrographdata'
+        ).prefetch_related('hornercoefficients_set')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        project = self.get_object()
-        context['horner_coefficients'] = HornerCoefficients.objects.filter(project=project)
-        context['watershed_params'] = WatershedParameters.objects.filter(project=project).first()
-        context['rainfall_params'] = RainfallParameters.objects.filter(project=project).first()
-        context['computation_results'] = ComputationResults.objects.filter(project=project).first()
-        context['unit_hydrograph_data'] = UnitHydrographData.objects.filter(project=project).first()
+        project = self.object
+        context['horner_coefficients'] = project.hornercoefficients_set.all()
+        context['watershed_params'] = getattr(project, 'watershedparameters', None)
+        context['rainfall_params'] = getattr(project, 'rainfallparameters', None)
+        context['computation_results'] = getattr(project, 'computationresults', None)
+        context['unit_hydrograph_data'] = getattr(project, 'unithydrographdata', None)
         return context
 
 
@@ -44,62 +63,51 @@ class ProjectCreateView(CreateView):
     success_url = reverse_lazy('hydrology:project_list')
     
     def form_valid(self, form):
-        response = super().form_valid(form)
-        project = form.instance
-        
-        # Create Horner coefficients
-        for i in range(6):
-            return_period = int(self.request.POST.get(f'return_period_{i}'))
-            coefficient_a = float(self.request.POST.get(f'coefficient_a_{i}'))
-            coefficient_b = float(self.request.POST.get(f'coefficient_b_{i}'))
-            coefficient_c = float(self.request.POST.get(f'coefficient_c_{i}'))
+        post = self.request.POST
+        with transaction.atomic():
+            response = super().form_valid(form)
+            project = form.instance
+            
+            # Create Horner coefficients in a single multi-row INSERT
+            HornerCoefficients.objects.bulk_create([
+                HornerCoefficients(
+                    project=project,
+                    return_period=int(post.get(f'return_period_{i}')),
+                    coefficient_a=float(post.get(f'coefficient_a_{i}')),
+                    coefficient_b=float(post.get(f'coefficient_b_{i}')),
+                    coefficient_c=float(post.get(f'coefficient_c_{i}')),
+                )
+                for i in range(6)
+            ])
+            
+            # Create watershed parameters
+            tc_method = post.get('tc_calculation_method', 'computed')
             
-            HornerCoefficients.objects.create(
+            watershed_data = {
+                'project': project,
+                'area': float(post.get('area')),
+                'tc_calculation_method': tc_method
+            }
+            
+            tc_fields = WATERSHED_COMPUTED_FIELDS if tc_method == 'computed' else WATERSHED_DIRECT_FIELDS
+            watershed_data.update({key: float(post.get(key)) for key in tc_fields})
+            
+            WatershedParameters.objects.create(**watershed_data)
+            
+            # Create rainfall parameters
+            RainfallParameters.objects.create(
                 project=project,
-                return_period=return_period,
-                coefficient_a=coefficient_a,
-                coefficient_b=coefficient_b,
-                coefficient_c=coefficient_c
+                **{key: parse(post.get(key)) for key, parse in RAINFALL_FIELDS}
+            )
+            
+            # Create default unit hydrograph data
+            time_ratios, discharge_ratios = DimensionlessUnitHydrograph.get_default_dimensionless_uh()
+            UnitHydrographData.objects.create(
+                project=project,
+                time_ratios=time_ratios.tolist(),
+                discharge_ratios=discharge_ratios.tolist(),
+                effective_rainfall=10.0
             )
-        
-        # Create watershed parameters
-        tc_method = self.request.POST.get('tc_calculation_method', 'computed')
-        
-        watershed_data = {
-            'project': project,
-            'area': float(self.request.POST.get('area')),
-            'tc_calculation_method': tc_method
-        }
-        
-        if tc_method == 'computed':
-            watershed_data.update({
-                'length': float(self.request.POST.get('length')),
-                'elevation_diff': float(self.request.POST.get('elevation_diff')),
-                'manning_n': float(self.request.POST.get('manning_n')),
-                'hydraulic_radius': float(self.request.POST.get('hydraulic_radius')),
-            })
-        else:  # direct method
-            watershed_data.update({
-                'time_concentration': float(self.request.POST.get('time_concentration')),
-            })
-        
-        WatershedParameters.objects.create(**watershed_data)
-        
-        # Create rainfall parameters
-        RainfallParameters.objects.create(
-            project=project,
-            curve_number=int(self.request.POST.get('curve_number')),
-            unit_duration=float(self.request.POST.get('unit_duration'))
-        )
-        
-        # Create default unit hydrograph data
-        time_ratios, discharge_ratios = DimensionlessUnitHydrograph.get_default_dimensionless_uh()
-        UnitHydrographData.objects.create(
-            project=project,
-            time_ratios=time_ratios.tolist(),
-            discharge_ratios=discharge_ratios.tolist(),
-            effective_rainfall=10.0
-        )
         
         messages.success(self.request, f'Project "{project.name}" created successfully!')
         return response
@@ -113,227 +121,227 @@ class ProjectUpdateView(UpdateView):
     def get_success_url(self):
         return reverse_lazy('hydrology:project_detail', kwargs={'pk': self.object.pk})
     
+    def get_queryset(self):
+        return HydrologyProject.objects.select_related('watershedparameters', 'rainfallparameters')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Get existing related objects
-        context['watershed_params'] = WatershedParameters.objects.filter(project=self.object).first()
-        context['rainfall_params'] = RainfallParameters.objects.filter(project=self.object).first()
-        context['horner_coeffs'] = HornerCoefficients.objects.filter(project=self.object)
+        context['watershed_params'] = getattr(self.object, 'watershedparameters', None)
+        context['rainfall_params'] = getattr(self.object, 'rainfallparameters', None)
+        context['horner_coeffs'] = self.object.hornercoefficients_set.all()
         
         return context
     
     def form_valid(self, form):
         response = super().form_valid(form)
         project = form.instance
+        post = self.request.POST
         
         # Update watershed parameters if provided
-        watershed_params = WatershedParameters.objects.filter(project=project).first()
+        watershed_params = getattr(project, 'watershedparameters', None)
         if watershed_params:
-            tc_method = self.request.POST.get('tc_calculation_method', watershed_params.tc_calculation_method)
-            
-            watershed_data = {
-                'tc_calculation_method': tc_method
-            }
+            tc_method = post.get('tc_calculation_method', watershed_params.tc_calculation_method)
             
+            # Parse the fields of the selected method and clear those of the other one
             if tc_method == 'computed':
-                watershed_data.update({
-                    'length': float(self.request.POST.get('length', watershed_params.length)),
-                    'elevation_diff': float(self.request.POST.get('elevation_diff', watershed_params.elevation_diff)),
-                    'manning_n': float(self.request.POST.get('manning_n', watershed_params.manning_n)),
-                    'hydraulic_radius': float(self.request.POST.get('hydraulic_radius', watershed_params.hydraulic_radius)),
-                })
-                watershed_data['time_concentration'] = None
+                tc_fields, cleared_fields = WATERSHED_COMPUTED_FIELDS, WATERSHED_DIRECT_FIELDS
             else:  # direct method
-                watershed_data.update({
-                    'time_concentration': float(self.request.POST.get('time_concentration', watershed_params.time_concentration)),
-                })
-                watershed_data['length'] = None
-                watershed_data['elevation_diff'] = None
-                watershed_data['manning_n'] = None
-                watershed_data['hydraulic_radius'] = None
+                tc_fields, cleared_fields = WATERSHED_DIRECT_FIELDS, WATERSHED_COMPUTED_FIELDS
+            
+            watershed_data = {
+                'tc_calculation_method': tc_method,
+                **{key: float(post.get(key, getattr(watershed_params, key))) for key in tc_fields},
+                **dict.fromkeys(cleared_fields, None),
+            }
             
             for key, value in watershed_data.items():
                 setattr(watershed_params, key, value)
             watershed_params.save()
         
         # Update rainfall parameters if provided
-        rainfall_params = RainfallParameters.objects.filter(project=project).first()
+        rainfall_params = getattr(project, 'rainfallparameters', None)
         if rainfall_params:
-            rainfall_params.curve_number = int(self.request.POST.get('curve_number', rainfall_params.curve_number))
-            rainfall_params.unit_duration = float(self.request.POST.get('unit_duration', rainfall_params.unit_duration))
+            for key, parse in RAINFALL_FIELDS:
+                setattr(rainfall_params, key, parse(post.get(key, getattr(rainfall_params, key))))
             rainfall_params.save()
         
         messages.success(self.request, f'Project "{form.instance.name}" updated successfully!')
         return response
 
 
+# Serialized chart data for project_results, cached per computation run
+RESULTS_CHART_FIELDS = ['hyetograph', 'effective_rainfall', 'unit_hydrograph', 'outflow_hydrograph']
+RESULTS_CACHE_TIMEOUT = 3600  # seconds
+
+
+def _dumps(value, empty):
+    """Serialize chart data for the results template, substituting `empty` for missing values"""
+    if value is None or len(value) == 0:
+        value = empty
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
 def project_compute(request, pk):
-    """Run complete hydrograph computation for a project"""
-    project = get_object_or_404(HydrologyProject, pk=pk)
+    """Queue the complete hydrograph computation for a project"""
+    project = get_object_or_404(
+        HydrologyProject.objects.select_related(
+            'watershedparameters', 'rainfallparameters', 'unithydrographdata', 'computationresults'
+        ),
+        pk=pk,
+    )
     
-    # Get all required data
-    horner_coeffs = HornerCoefficients.objects.filter(project=project)
-    watershed_params = WatershedParameters.objects.filter(project=project).first()
-    rainfall_params = RainfallParameters.objects.filter(project=project).first()
-    unit_hydrograph_data = UnitHydrographData.objects.filter(project=project).first()
+    # Check the required data; the worker loads it again when it runs
+    horner_coeffs = project.hornercoefficients_set.exists()
+    watershed_params = getattr(project, 'watershedparameters', None)
+    rainfall_params = getattr(project, 'rainfallparameters', None)
+    unit_hydrograph_data = getattr(project, 'unithydrographdata', None)
     
     if not all([horner_coeffs, watershed_params, rainfall_params, unit_hydrograph_data]):
         messages.error(request, 'Project configuration incomplete. Please check all parameters.')
         return redirect('hydrology:project_detail', pk=pk)
     
+    # Mark the run as pending before handing it to a worker, so the task never reads
+    # the results row before it exists
+    results = getattr(project, 'computationresults', None)
+    with transaction.atomic():
+        if results is None:
+            ComputationResults.objects.create(
+                project=project, status=ComputationResults.STATUS_PENDING, started_at=timezone.now()
+            )
+        else:
+            ComputationResults.objects.filter(pk=results.pk).update(
+                status=ComputationResults.STATUS_PENDING, error_message='', started_at=timezone.now()
+            )
+    
     try:
-        # Prepare Horner coefficients dictionary
-        horners = {coeff.return_period: {'a': coeff.coefficient_a, 'b': coeff.coefficient_b, 'c': coeff.coefficient_c} 
-                  for coeff in horner_coeffs}
-        
-        # Target configurations
-        return_periods = [2, 5, 10, 25, 50, 100]
-        durations_a = [5, 10, 30, 60, 120, 180, 360, 1440]  # minutes
-        durations_b = [1, 3, 6, 12, 18, 24]  # hours
-        
-        # Step 1: Compute intensity table
-        intensity_table = HornerTable.compute_intensity_table(horners, durations_a)
-        
-        # Step 2: Compute accumulated precipitation table
-        accumulation_table = HornerTable.compute_accumulated_table(intensity_table, durations_a)
-        
-        # Step 3: Compute Horner rain type (using 100-year return period for hyetograph)
-        max_return_period = max(horners.keys())
-        max_coeffs = horners[max_return_period]
-        times, intensities, accumulated = HornerRainType.compute_precipitation_list(
-            max_coeffs, rainfall_params.unit_duration
-        )
-        
-        # Step 4: Compute unit duration precipitation and percentages
-        unit_precip = HornerRainType.compute_unit_duration_precipitation(times, accumulated)
-        unit_precip_percent = [p * 100 / sum(unit_precip) if sum(unit_precip) > 0 else 0 for p in unit_precip]
-        sorted_percentages = HornerRainType.alternating_block_sort(unit_precip_percent)
-        
-        # Step 5: Create hyetograph using 24hr precipitation
-        total_24hr_precip = accumulation_table.get(max_return_period, {}).get(1440, 0)
-        hyetograph = HornerRainType.create_hyetograph(sorted_percentages, total_24hr_precip)
-        
-        # Step 6: Compute effective rainfall
-        effective_rainfall = EffectiveRainfall.compute_effective_rainfall(hyetograph, rainfall_params.curve_number)
-        
-        # Step 7: Get time of concentration
-        if watershed_params.tc_calculation_method == 'direct':
-            time_concentration = watershed_params.time_concentration
+        run_project_compute.delay(pk)
+    except OperationalError as e:
+        # The broker is unreachable: keep the previous results, or record the failure of a first run
+        if results is None:
+            ComputationResults.objects.filter(project=project).update(
+                status=ComputationResults.STATUS_FAILED, error_message=f'Could not queue the computation: {e}'
+            )
         else:
-            # Compute from watershed parameters
-            slope = watershed_params.elevation_diff / watershed_params.length if watershed_params.length > 0 else 0
-            time_concentration = TimeConcentration.compute_time_of_concentration(
-                watershed_params.length,
-                watershed_params.elevation_diff,
-                watershed_params.manning_n,
-                watershed_params.hydraulic_radius,
-                slope
+            ComputationResults.objects.filter(pk=results.pk).update(
+                status=results.status, error_message=results.error_message, started_at=results.started_at
             )
-        
-        # Step 8: Compute unit hydrograph
-        t_b, t_p, q_p = DimensionlessUnitHydrograph.compute_peak_flow(
-            time_concentration,
-            watershed_params.area,
-            unit_hydrograph_data.effective_rainfall,
-            rainfall_params.unit_duration
-        )
-        
-        T, Q = DimensionlessUnitHydrograph.compute_unit_hydrograph(
-            t_p, q_p, 
-            unit_hydrograph_data.time_ratios,
-            unit_hydrograph_data.discharge_ratios
-        )
-        
-        T_interp, Q_interp = DimensionlessUnitHydrograph.interpolate_unit_hydrograph(
-            T, Q, rainfall_params.unit_duration
-        )
-        
-        # Step 9: Compute outflow hydrograph
-        outflow_hydrograph = DimensionlessUnitHydrograph.compute_outflow_hydrograph(Q_interp, effective_rainfall)
-        
-        # Save results
-        results, created = ComputationResults.objects.get_or_create(project=project)
-        results.intensity_table = {str(k): {str(k2): v2 for k2, v2 in v.items()} for k, v in intensity_table.items()}
-        results.accumulation_table = {str(k): {str(k2): v2 for k2, v2 in v.items()} for k, v in accumulation_table.items()}
-        results.hyetograph = hyetograph
-        results.effective_rainfall = effective_rainfall
-        results.time_concentration = time_concentration
-        results.unit_hydrograph = {'time': T_interp, 'discharge': Q_interp}
-        results.outflow_hydrograph = outflow_hydrograph
-        results.save()
-        
-        messages.success(request, 'Hydrograph computation completed successfully!')
-        return redirect('hydrology:project_results', pk=pk)
-        
-    except Exception as e:
-        messages.error(request, f'Computation failed: {str(e)}')
+        messages.error(request, f'Computation could not be started: {str(e)}')
         return redirect('hydrology:project_detail', pk=pk)
+    
+    messages.info(request, 'Hydrograph computation started.')
+    return redirect('hydrology:project_results', pk=pk)
+
+
+def _expire_stale_computation(results):
+    """Report a computation whose worker never picked it up or died mid-run as failed"""
+    if results.is_stale():
+        # Conditional on the state read, so a worker finishing meanwhile is not overwritten
+        ComputationResults.objects.filter(
+            pk=results.pk, status=results.status, started_at=results.started_at
+        ).update(
+            status=ComputationResults.STATUS_FAILED,
+            error_message='The computation did not finish in time. Please run it again.',
+        )
+        results.refresh_from_db(fields=['status', 'error_message'])
+
+
+def project_status(request, pk):
+    """Report the status of the latest computation, polled by the results page"""
+    results = get_object_or_404(
+        ComputationResults.objects.only('status', 'error_message', 'started_at'), project_id=pk
+    )
+    _expire_stale_computation(results)
+    return JsonResponse({'status': results.status, 'error_message': results.error_message})
 
 
 def project_results(request, pk):
     """Display computation results with visualization"""
-    project = get_object_or_404(HydrologyProject, pk=pk)
-    results = ComputationResults.objects.filter(project=project).first()
-    rainfall_params = RainfallParameters.objects.filter(project=project).first()
+    # The chart series are only loaded from the database when the cache misses
+    project = get_object_or_404(
+        HydrologyProject.objects.select_related('computationresults', 'rainfallparameters')
+        .defer(*(f'computationresults__{field}' for field in RESULTS_CHART_FIELDS)),
+        pk=pk,
+    )
+    results = getattr(project, 'computationresults', None)
+    rainfall_params = getattr(project, 'rainfallparameters', None)
     
     if not results:
         messages.error(request, 'No computation results found. Please run the computation first.')
         return redirect('hydrology:project_detail', pk=pk)
     
-    # Import json for proper serialization
-    import json
+    # Until the worker finishes, render a page that polls project_status
+    _expire_stale_computation(results)
+    if results.status != ComputationResults.STATUS_DONE:
+        return render(request, 'hydrology/project_pending.html', {'project': project, 'results': results})
+    
+    # computed_at is part of the key, so a new computation never sees stale chart data
+    cache_key = f'hydro:results:{project.pk}:{results.computed_at.timestamp()}'
+    charts = cache.get(cache_key)
+    if charts is None:
+        results.refresh_from_db(fields=RESULTS_CHART_FIELDS)
+        charts = {
+            'hyetograph': _dumps(results.hyetograph, []),
+            'effective_rainfall': _dumps(results.effective_rainfall, []),
+            'unit_hydrograph': _dumps(results.unit_hydrograph, {'time': [], 'discharge': []}),
+            'outflow_hydrograph': _dumps(results.outflow_hydrograph, []),
+        }
+        cache.set(cache_key, charts, RESULTS_CACHE_TIMEOUT)
     
     context = {
         'project': project,
         'results': results,
         'intensity_table': results.intensity_table,
         'accumulation_table': results.accumulation_table,
-        'hyetograph': json.dumps(results.hyetograph if results.hyetograph else []),
-        'effective_rainfall': json.dumps(results.effective_rainfall if results.effective_rainfall else []),
         'time_concentration': results.time_concentration,
-        'unit_hydrograph': json.dumps(results.unit_hydrograph if results.unit_hydrograph else {'time': [], 'discharge': []}),
-        'outflow_hydrograph': json.dumps(results.outflow_hydrograph if results.outflow_hydrograph else []),
         'rainfall_params': rainfall_params,
+        **charts,
     }
     
     return render(request, 'hydrology/project_results.html', context)
 
 
+class Echo:
+    """File-like object whose write() returns the value, so csv.writer rows can be yielded"""
+    def write(self, value):
+        return value
+
+
 def export_results(request, pk, format_type):
     """Export computation results in specified format"""
-    project = get_object_or_404(HydrologyProject, pk=pk)
-    results = ComputationResults.objects.filter(project=project).first()
+    project = get_object_or_404(HydrologyProject.objects.select_related('computationresults'), pk=pk)
+    results = getattr(project, 'computationresults', None)
     
-    if not results:
+    if not results or results.status != ComputationResults.STATUS_DONE:
         messages.error(request, 'No computation results found.')
         return redirect('hydrology:project_detail', pk=pk)
     
     if format_type == 'csv':
-        # Create CSV response
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['Project Name', project.name])
-        writer.writerow(['Computed At', results.computed_at])
-        writer.writerow([])
-        
-        # Write intensity table
-        writer.writerow(['Intensity Table (mm/hr)'])
-        writer.writerow(['Return Period', 'Duration (min)', 'Intensity'])
-        for period_str, period_data in results.intensity_table.items():
-            for duration_str, intensity in period_data.items():
-                writer.writerow([period_str, duration_str, intensity])
-        
-        writer.writerow([])
-        writer.writerow(['Outflow Hydrograph'])
-        writer.writerow(['Time Step', 'Discharge (cms)'])
-        for i, discharge in enumerate(results.outflow_hydrograph):
-            writer.writerow([i, discharge])
+        # Stream the CSV one row at a time instead of buffering the whole file
+        writer = csv.writer(Echo())
+        
+        def rows():
+            # Write headers
+            yield writer.writerow(['Project Name', project.name])
+            yield writer.writerow(['Computed At', results.computed_at])
+            yield writer.writerow([])
+            
+            # Write intensity table
+            yield writer.writerow(['Intensity Table (mm/hr)'])
+            yield writer.writerow(['Return Period', 'Duration (min)', 'Intensity'])
+            for period_str, period_data in results.intensity_table.items():
+                for duration_str, intensity in period_data.items():
+                    yield writer.writerow([period_str, duration_str, intensity])
+            
+            yield writer.writerow([])
+            yield writer.writerow(['Outflow Hydrograph'])
+            yield writer.writerow(['Time Step', 'Discharge (cms)'])
+            for i, discharge in enumerate(results.outflow_hydrograph):
+                yield writer.writerow([i, discharge])
         
         # Create response
-        response = HttpResponse(output.getvalue(), content_type='text/csv')
+        response = StreamingHttpResponse(rows(), content_type='text/csv')
         response['Content-Disposition'] = f'attachment; filename="{project.name}_results.csv"'
         return response
     
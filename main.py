@@ -1,6 +1,39 @@
+import functools
+from types import MappingProxyType
+
 import numpy as np
 
 
+# Professional IDF mock data based on typical urban drainage designs.
+# The coefficients 'b' and 'c' are often constant for a location, 
+# while 'a' increases with the return period.
+# Entries are read-only, since Horner_table hands out the cached values themselves.
+_HORNER_DATA = {
+    2:   MappingProxyType({"a": 1666.842, "b": 23.246, "c": 0.731}),
+    5:   MappingProxyType({"a": 1914.351, "b": 34.037, "c": 0.694}),
+    10:  MappingProxyType({"a": 2052.866, "b": 40.099, "c": 0.69}),
+    25:  MappingProxyType({"a": 2184.709, "b": 44.84, "c": 0.693}),
+    50:  MappingProxyType({"a": 2228.156, "b": 45.631, "c": 0.694}),
+    100: MappingProxyType({"a": 2232.124, "b": 44.432, "c": 0.694}),
+}
+_SORTED_PERIODS = sorted(_HORNER_DATA)
+
+# The known dimensionless_unit_hydrograph (SCS/NRCS dimensionless unit hydrograph)
+# Q_Qp values at specific T/Tp ratios
+_SCS_T_TP = np.array([
+    0.0, 0.1, 0.2, 0.3,0.4,0.5,0.6,0.7,0.8,0.9,1.0,1.1,1.2,1.3,1.4,1.5,1.6,1.7,1.8,1.9,2.0,2.2,2.4,2.6,2.8,3.0,3.2,3.4,3.6,3.8,4.0,4.5,5.0,
+], dtype=np.float64)
+_SCS_T_TP.flags.writeable = False
+
+_SCS_Q_QP = np.array([
+    0.000, 0.030, 0.100, 0.190, 0.310, 0.470, 0.660, 0.820, 0.930, 0.990, 1.000, 0.990,
+    0.930, 0.860, 0.780, 0.680, 0.560, 0.460, 0.390, 0.330, 0.280, 0.207, 0.147, 0.107,
+    0.077, 0.055, 0.040, 0.029, 0.021, 0.015, 0.011, 0.005, 0.000,
+], dtype=np.float64)
+_SCS_Q_QP.flags.writeable = False
+
+
+@functools.lru_cache(maxsize=None)
 def Horner_table(return_period):
     """
     Look up Horner coefficients (a, b, c) for a given return period.
@@ -11,30 +44,17 @@ def Horner_table(return_period):
         return_period (int): Return period in years (e.g., 2, 5, 10, 20, 50, 100)
         
     Returns:
-        dict: Horner coefficients {'a': ..., 'b': ..., 'c': ...}
+        Mapping: read-only Horner coefficients {'a': ..., 'b': ..., 'c': ...}
     """
-    # Professional IDF mock data based on typical urban drainage designs.
-    # The coefficients 'b' and 'c' are often constant for a location, 
-    # while 'a' increases with the return period.
-    data = {
-        2:   {"a": 1666.842, "b": 23.246, "c": 0.731},
-        5:   {"a": 1914.351, "b": 34.037, "c": 0.694},
-        10:  {"a": 2052.866, "b": 40.099, "c": 0.69},
-        25:  {"a": 2184.709, "b": 44.84, "c": 0.693},
-        50:  {"a": 2228.156, "b": 45.631, "c": 0.694},
-        100: {"a": 2232.124, "b": 44.432, "c": 0.694},
-    }
-    
     # Return the exact match or the closest lower return period if not found
-    if return_period in data:
-        return data[return_period]
+    if return_period in _HORNER_DATA:
+        return _HORNER_DATA[return_period]
     
     # Simple interpolation or fallback for test purposes
-    sorted_periods = sorted(data.keys())
-    for p in reversed(sorted_periods):
+    for p in reversed(_SORTED_PERIODS):
         if return_period >= p:
-            return data[p]
-    return data[sorted_periods[0]]
+            return _HORNER_DATA[p]
+    return _HORNER_DATA[_SORTED_PERIODS[0]]
 
 def compute_intensity(a, b, c, t):
     """ 
@@ -58,35 +78,35 @@ def compute_accumulated_precipitation(intensity, duration):
     """
     return intensity * duration
 
+def _compute_intensity_grid(return_periods, durations):
+    """ 
+    Evaluate the Horner formula over a (return_periods x durations) grid in one broadcast.
+    Returns: (durations array, intensity array rounded to 4 decimals)
+    """
+    params = [Horner_table(p) for p in return_periods]
+    a = np.array([coeffs["a"] for coeffs in params], dtype=np.float64)[:, None]
+    b = np.array([coeffs["b"] for coeffs in params], dtype=np.float64)[:, None]
+    c = np.array([coeffs["c"] for coeffs in params], dtype=np.float64)[:, None]
+    t = np.asarray(durations, dtype=np.float64)[None, :]
+    return t, np.round(compute_intensity(a, b, c, t), 4)
+
 def compute_intensity_table(return_periods, durations):
     """ 
     Compute the precipitation intensity table across different return_periods and durations.
     Returns: {return_period: {duration: intensity}}
     """
-    table = {}
-    for p in return_periods:
-        params = Horner_table(p)
-        table[p] = {}
-        for t in durations:
-            intensity = compute_intensity(params["a"], params["b"], params["c"], t)
-            table[p][t] = round(intensity, 4)
-    return table
+    _, intensity = _compute_intensity_grid(return_periods, durations)
+    return {p: dict(zip(durations, row)) for p, row in zip(return_periods, intensity.tolist())}
 
 def compute_accumulated_precipitation_table(return_periods, durations):
     """
     Compute the accumulated precipitation table across different return_periods and durations.
     Returns: {return_period: {duration: accumulation}}
     """
-    # We can reuse compute_intensity_table or calculate directly
-    intensity_table = compute_intensity_table(return_periods, durations)
-    acc_table = {}
-    for p in return_periods:
-        acc_table[p] = {}
-        for t in durations:
-            intensity = intensity_table[p][t]
-            accumulation = compute_accumulated_precipitation(intensity, t)
-            acc_table[p][t] = round(accumulation, 2)
-    return acc_table
+    # Accumulate from the rounded intensities, as listed in the intensity table
+    t, intensity = _compute_intensity_grid(return_periods, durations)
+    accumulation = np.round(compute_accumulated_precipitation(intensity, t), 2)
+    return {p: dict(zip(durations, row)) for p, row in zip(return_periods, accumulation.tolist())}
 
 
 # ============================================================
@@ -123,20 +143,7 @@ def get_unit_hydrograph(Tp, Qp):
         T: Time array (hr)
         Q: Discharge array (cms)
     """
-    # The known dimensionless_unit_hydrograph (SCS/NRCS dimensionless unit hydrograph)
-    # Q_Qp values at specific T/Tp ratios
-
-    T_Tp = np.asarray([
-        0.0, 0.1, 0.2, 0.3,0.4,0.5,0.6,0.7,0.8,0.9,1.0,1.1,1.2,1.3,1.4,1.5,1.6,1.7,1.8,1.9,2.0,2.2,2.4,2.6,2.8,3.0,3.2,3.4,3.6,3.8,4.0,4.5,5.0,
-    ])
-
-    Q_Qp = np.asarray([
-        0.000, 0.030, 0.100, 0.190, 0.310, 0.470, 0.660, 0.820, 0.930, 0.990, 1.000, 0.990,
-        0.930, 0.860, 0.780, 0.680, 0.560, 0.460, 0.390, 0.330, 0.280, 0.207, 0.147, 0.107,
-        0.077, 0.055, 0.040, 0.029, 0.021, 0.015, 0.011, 0.005, 0.000,
-    ])
-    
-    return T_Tp*Tp, Q_Qp*Qp
+    return _SCS_T_TP*Tp, _SCS_Q_QP*Qp
 
 def get_interpolated_unit_hdrograph(Tp, Qp, tr):
     """
@@ -157,14 +164,13 @@ def get_interpolated_unit_hdrograph(Tp, Qp, tr):
     """
     T, Q = get_unit_hydrograph(Tp, Qp)
 
-    # Create new time array with uniform intervals
-    T_interp = np.arange(0, T[-1] + tr, tr)
+    # Create new time array with uniform intervals covering the base time;
+    # linspace places every point exactly instead of accumulating tr
+    n = int(np.ceil(T[-1] / tr)) + 1
+    T_interp = np.linspace(0.0, (n - 1) * tr, n)
     
     # Interpolate discharge values to the new time points
     Q_interp = np.interp(T_interp, T, Q)
-
-    print(T)
-    print(Q)
     
     return T_interp, Q_interp
 